@@ -1,5 +1,9 @@
 import argparse
+import contextlib
+import multiprocessing
+import os
 from datetime import datetime
+from typing import Tuple
 
 from eth_keys import keys
 from hdwallet import BIP44HDWallet
@@ -12,13 +16,7 @@ class DucatusXMainnet(EthereumMainnet):
     COIN_TYPE = CoinType({"INDEX": 1060, "HARDENED": True})
 
 
-parser = argparse.ArgumentParser()
-parser.add_argument("n", metavar="N", type=int, help="priv keys number")
-
-args = parser.parse_args()
-date = datetime.now().strftime("%Y-%m-%d-%H.%M.%S")
-
-for i in range(args.n):
+def generate_key(_: int) -> Tuple[str, str, str, str]:
     mnemonic = generate_mnemonic(language="english", strength=128)
     bip44_hdwallet = BIP44HDWallet(
         cryptocurrency=DucatusXMainnet, account=0, change=False, address=0
@@ -27,18 +25,47 @@ for i in range(args.n):
     priv_key_hexstr = bip44_hdwallet.private_key()
     priv_key = keys.PrivateKey(Web3.toBytes(hexstr=priv_key_hexstr))
     pub_key = str(priv_key.public_key)
+    return mnemonic, priv_key_hexstr, pub_key[2:], bip44_hdwallet.address()
 
-    with open(f"privkeys-{date}.txt", "a") as f:
-        f.write(priv_key_hexstr + "\n")
 
-    with open(f"mnemonics-{date}.txt", "a") as f:
-        f.write(mnemonic + "\n")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("n", metavar="N", type=int, help="priv keys number")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of generating processes"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=100, help="keys per task sent to worker"
+    )
+    parser.add_argument(
+        "--enodes-dir", help="write pubkeys file to backend enodes_dir instead"
+    )
 
-    with open(f"pubkeys-{date}.txt", "a") as f:
-        f.write(pub_key[2:] + "\n")
+    args = parser.parse_args()
+    date = datetime.now().strftime("%Y-%m-%d-%H.%M.%S")
+    pubkeys_dir = args.enodes_dir or "."
+    os.makedirs(pubkeys_dir, exist_ok=True)
 
-    with open(f"keys-{date}.csv", "a") as f:
-        to_write = ",".join(
-            [mnemonic, priv_key_hexstr, pub_key[2:], bip44_hdwallet.address()]
+    with contextlib.ExitStack() as stack:
+        privkeys_file = stack.enter_context(open(f"privkeys-{date}.txt", "w"))
+        mnemonics_file = stack.enter_context(open(f"mnemonics-{date}.txt", "w"))
+        pubkeys_file = stack.enter_context(
+            open(os.path.join(pubkeys_dir, f"pubkeys-{date}.txt"), "w")
         )
-        f.write(to_write + "\n")
+        keys_file = stack.enter_context(open(f"keys-{date}.csv", "w"))
+
+        if args.workers > 1:
+            pool = stack.enter_context(multiprocessing.Pool(args.workers))
+            generated_keys = pool.imap_unordered(
+                generate_key, range(args.n), chunksize=args.chunk_size
+            )
+        else:
+            generated_keys = map(generate_key, range(args.n))
+
+        for mnemonic, priv_key_hexstr, pub_key, address in generated_keys:
+            privkeys_file.write(priv_key_hexstr + "\n")
+            mnemonics_file.write(mnemonic + "\n")
+            pubkeys_file.write(pub_key + "\n")
+            keys_file.write(
+                ",".join([mnemonic, priv_key_hexstr, pub_key, address]) + "\n"
+            )
@@ -4,3 +4,26 @@ DECIMALS = {
     "DUCX": 18,
     "DUC": 8,
 }
+ONLINE_PEERS_KEY = "online_peers"
+ONLINE_PEERS_STALE_KEY = "online_peers:stale"
+ONLINE_PEERS_LOCK_KEY = "online_peers:lock"
+ONLINE_PEERS_EXPIRE_SECS = 5 * 60
+ONLINE_PEERS_STALE_EXPIRE_SECS = 60 * 60
+ONLINE_PEERS_LOCK_EXPIRE_SECS = 60
+ONLINE_PEERS_WAIT_INTERVAL_SECS = 0.1
+PEER_STATUSES_KEY = "peer_statuses"
+PEER_STATUS_CHANGES_CHANNEL = "peer_status_changes"
+PEER_STATUS_STREAM_KEEPALIVE_SECS = 15
+PING_NODES_BATCH_SIZE = 100
+DAILY_UPTIME_BATCH_SIZE = 1000
+LEDGER_EXPORT_BATCH_SIZE = 1000
+NETWORK_STATS_KEY = "network_stats"
+NETWORK_STATS_LEADERBOARD_SIZE = 10
+NETWORK_STATS_CACHE_MAX_AGE_SECS = 60
+PEER_ADDRESSES_BATCH_SIZE = 1000
+RECONCILIATION_LAST_BLOCK_KEY = "reconciliation:last_block"
+RECONCILIATION_DISCREPANCIES_KEY = "reconciliation:discrepancies"
+RECONCILIATION_LEFTOVERS_KEY = "reconciliation:leftovers"
+RECONCILIATION_BLOCKS_BATCH_SIZE = 100
+RECONCILIATION_MAX_BLOCKS_PER_RUN = 10_000
+RECONCILIATION_CONFIRMATIONS = 12
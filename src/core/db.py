@@ -1,20 +1,30 @@
+from typing import Type
+
 from fastapi import FastAPI
 from tortoise import Tortoise
 from tortoise.contrib.fastapi import register_tortoise
+from tortoise.models import Model
+
+from src.settings import get_tortoise_config
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model: Type[Model]) -> str:
+        return "read"
 
-from src.settings import MODELS_MODULE, POSTGRES_URL
+    def db_for_write(self, model: Type[Model]) -> str:
+        return "default"
 
 
 async def init_db(app: FastAPI = None) -> None:
     if app:
         register_tortoise(
             app,
-            db_url=POSTGRES_URL,
-            modules={"models": MODELS_MODULE},
+            config=get_tortoise_config("api"),
             generate_schemas=False,
             add_exception_handlers=True,
         )
         return
     else:
-        await Tortoise.init(db_url=POSTGRES_URL, modules={"models": MODELS_MODULE})
+        await Tortoise.init(config=get_tortoise_config("scheduler"))
         await Tortoise.generate_schemas()
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from apscheduler.schedulers.base import BaseScheduler
+
+logger = logging.getLogger("src.core.jobs")
+
+
+class ManagedJob:
+    """
+    Interval job which never overlaps with itself, coalesces missed runs,
+    is cancelled after deadline and backs off while it overruns its interval.
+    Deadline is scaled together with interval, so a backed off job gets
+    the extra time it needs instead of being cancelled forever.
+    Cancellation happens at awaits only, so blocking calls in the job
+    must go through src.utils.run_sync for the deadline to work
+    """
+
+    def __init__(
+        self,
+        scheduler: BaseScheduler,
+        func: Callable[[], Awaitable[Any]],
+        interval_secs: int,
+        timeout_secs: Optional[int] = None,
+        jitter_secs: Optional[int] = None,
+        max_interval_secs: Optional[int] = None,
+    ) -> None:
+        self.func = func
+        self.name = func.__name__
+        self.base_interval_secs = interval_secs
+        self.interval_secs = interval_secs
+        self.max_interval_secs = max_interval_secs or interval_secs * 8
+        self.timeout_secs = timeout_secs
+        self.jitter_secs = jitter_secs
+        self.job = scheduler.add_job(
+            self.run,
+            "interval",
+            seconds=interval_secs,
+            jitter=jitter_secs,
+            id=self.name,
+            name=self.name,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=interval_secs,
+        )
+
+    async def run(self) -> None:
+        started_at = time.monotonic()
+        timeout_secs = self.current_timeout_secs
+        try:
+            if timeout_secs:
+                await asyncio.wait_for(self.func(), timeout_secs)
+            else:
+                await self.func()
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name} cancelled after {timeout_secs}s deadline")
+        finally:
+            self._adapt_interval(time.monotonic() - started_at)
+
+    @property
+    def current_timeout_secs(self) -> Optional[int]:
+        if not self.timeout_secs:
+            return None
+        return self.timeout_secs * self.interval_secs // self.base_interval_secs
+
+    def _adapt_interval(self, duration_secs: float) -> None:
+        """
+        Double interval while job runs longer than it,
+        halve it back towards base interval once job is fast again
+        :param duration_secs: duration of last run
+        :return: None
+        """
+        if duration_secs > self.interval_secs:
+            interval_secs = min(self.interval_secs * 2, self.max_interval_secs)
+        elif duration_secs <= self.base_interval_secs:
+            interval_secs = max(self.interval_secs // 2, self.base_interval_secs)
+        else:
+            return
+
+        if interval_secs == self.interval_secs:
+            return
+
+        logger.info(
+            f"{self.name} took {duration_secs:.1f}s, "
+            f"interval changed from {self.interval_secs}s to {interval_secs}s"
+        )
+        self.interval_secs = interval_secs
+        self.job.reschedule("interval", seconds=interval_secs, jitter=self.jitter_secs)
@@ -0,0 +1,96 @@
+import functools
+import logging
+import threading
+import uuid
+from typing import Any, Awaitable, Callable
+
+from src.redis_utils import RedisClient
+
+logger = logging.getLogger("src.core.leader")
+
+
+class LeaderElection:
+    def __init__(self, name: str, lease_ttl_secs: int) -> None:
+        self.key = f"leader:{name}"
+        self.token = uuid.uuid4().hex
+        self.lease_ttl_secs = lease_ttl_secs
+        self.is_leader = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._renew_forever, name=f"{self.key}-renewal", daemon=True
+        )
+
+    def refresh(self) -> None:
+        """
+        Renew lease if this process holds it, otherwise try to take it over
+        :return: None
+        """
+        if self.is_leader:
+            self.is_leader = RedisClient.expire_if_equal(
+                self.key, self.token, self.lease_ttl_secs
+            )
+            if not self.is_leader:
+                logger.warning(f"lost leadership for {self.key}")
+            return
+
+        self.is_leader = RedisClient.set_if_not_exists(
+            self.key, self.token, self.lease_ttl_secs
+        )
+        if self.is_leader:
+            logger.info(f"acquired leadership for {self.key}")
+
+    def start(self) -> None:
+        """
+        Take part in election and keep renewing lease from a thread,
+        so renewal does not depend on the event loop being responsive
+        :return: None
+        """
+        self.refresh()
+        self._thread.start()
+
+    def _renew_forever(self) -> None:
+        interval_secs = max(self.lease_ttl_secs / 3, 1)
+        while not self._stopped.wait(interval_secs):
+            try:
+                self.refresh()
+            except Exception as err:
+                self.is_leader = False
+                logger.warning(f"Cant renew lease {self.key} cause {err}")
+
+    def release(self) -> None:
+        """
+        Give up lease so that other process can take over without waiting for expiry
+        :return: None
+        """
+        self._stopped.set()
+        if self.is_leader:
+            RedisClient.delete_if_equal(self.key, self.token)
+            self.is_leader = False
+
+    def holds_lease(self) -> bool:
+        """
+        Check in Redis that lease still belongs to this process and extend it
+        :return: whether this process is the leader
+        """
+        self.is_leader = self.is_leader and RedisClient.expire_if_equal(
+            self.key, self.token, self.lease_ttl_secs
+        )
+        return self.is_leader
+
+    def leader_only(
+        self, func: Callable[..., Awaitable[Any]]
+    ) -> Callable[..., Awaitable[Any]]:
+        """
+        Wrap job so it is skipped on processes not holding the lease
+        :param func: coroutine function to run on leader only
+        :return: wrapped coroutine function
+        """
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            if not self.holds_lease():
+                logger.debug(f"not a leader, skip {func.__name__}")
+                return None
+            return await func(*args, **kwargs)
+
+        return wrapper
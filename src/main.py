@@ -1,5 +1,6 @@
 import asyncio
 import os
+import signal
 import sys
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -8,11 +9,15 @@ from tortoise import Tortoise
 sys.path.append(os.path.abspath(os.path.join(__file__, *[os.pardir] * 2)))
 
 from src.core.db import init_db
+from src.core.jobs import ManagedJob
+from src.core.leader import LeaderElection
+from src.rewards.reconciliation import reconcile_airdrops
 from src.rewards.tasks import (
     check_pending_airdrops,
     check_waiting_airdrops,
     ping_nodes,
     send_rewards,
+    update_network_stats,
     update_peer_addresses,
     update_rates,
 )
@@ -20,24 +25,75 @@ from src.settings import config
 
 if __name__ == "__main__":
     loop = asyncio.get_event_loop()
+    election = LeaderElection("scheduler", config.leader_lease_ttl_secs)
     try:
         loop.run_until_complete(init_db())
-        scheduler = AsyncIOScheduler()
-        scheduler.add_job(
-            ping_nodes, "interval", minutes=config.ping_nodes_interval_munutes
+        election.start()
+        scheduler = AsyncIOScheduler(
+            job_defaults={"max_instances": 1, "coalesce": True}
+        )
+        ping_nodes_interval_secs = config.ping_nodes_interval_munutes * 60
+        ManagedJob(
+            scheduler,
+            ping_nodes,
+            interval_secs=ping_nodes_interval_secs,
+            timeout_secs=ping_nodes_interval_secs,
+            jitter_secs=ping_nodes_interval_secs // 10,
+        )
+        ManagedJob(
+            scheduler,
+            election.leader_only(update_network_stats),
+            interval_secs=ping_nodes_interval_secs,
+            timeout_secs=ping_nodes_interval_secs,
+            jitter_secs=ping_nodes_interval_secs // 10,
+        )
+        # all RPC calls run in threads via run_sync, so jobs with timeout_secs
+        # are really cancelled at the deadline (a running RPC call finishes in
+        # its thread). Relaying jobs have no deadline: cancelling them after
+        # the tx is sent would roll back its hash and status
+        ManagedJob(
+            scheduler,
+            election.leader_only(check_waiting_airdrops),
+            interval_secs=60,
+            jitter_secs=5,
+        )
+        ManagedJob(
+            scheduler,
+            election.leader_only(check_pending_airdrops),
+            interval_secs=5,
+            timeout_secs=30,
+            jitter_secs=1,
+        )
+        ManagedJob(
+            scheduler,
+            election.leader_only(update_rates),
+            interval_secs=60,
+            timeout_secs=30,
+            jitter_secs=5,
+        )
+        ManagedJob(
+            scheduler,
+            election.leader_only(reconcile_airdrops),
+            interval_secs=10 * 60,
+            timeout_secs=9 * 60,
+            jitter_secs=30,
+        )
+        ManagedJob(
+            scheduler,
+            election.leader_only(update_peer_addresses),
+            interval_secs=10 * 60,
+            jitter_secs=30,
         )
-        scheduler.add_job(check_waiting_airdrops, "interval", minutes=1)
-        scheduler.add_job(check_pending_airdrops, "interval", seconds=5)
-        scheduler.add_job(update_peer_addresses, "interval", minutes=1)
-        scheduler.add_job(update_rates, "interval", minutes=1)
         scheduler.add_job(
-            send_rewards,
+            election.leader_only(send_rewards),
             "cron",
             hour=config.rewards_hour,
             misfire_grace_time=15 * 60,
             minute=10,
         )
         scheduler.start()
+        loop.add_signal_handler(signal.SIGTERM, loop.stop)
         loop.run_forever()
     finally:
+        election.release()
         loop.run_until_complete(Tortoise.close_connections())
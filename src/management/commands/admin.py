@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import csv
+import glob
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Iterator, List
+
+from tortoise import Tortoise, timezone
+from tortoise.exceptions import DoesNotExist
+
+sys.path.append(os.path.abspath(os.path.join(__file__, *[os.pardir] * 4)))
+
+from src.core.db import init_db
+from src.rewards.models import DailyUptime, Healthcheck, Peer, Rate
+from src.rewards.tasks import update_network_stats
+from src.settings import config
+from src.utils import pubkey_to_address, valid_enode
+
+logger = logging.getLogger("src.management.commands.admin")
+
+
+def chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
+
+
+def read_enodes(filenames: Iterable[str]) -> List[str]:
+    enodes = set()
+    for filename in filenames:
+        with open(filename) as f:
+            enodes.update(line.strip().lower() for line in f if line.strip())
+    return sorted(enodes)
+
+
+async def import_enodes(args: argparse.Namespace) -> None:
+    enodes = [enode for enode in read_enodes(args.files) if valid_enode(enode)]
+    reward_interest = (
+        args.interest
+        if args.interest is not None
+        else round(config.default_usd_reward_amount / 100, 18)
+    )
+
+    created_count = 0
+    for processed_count, batch in enumerate(chunks(enodes, args.batch_size), 1):
+        existing = set(
+            await Peer.filter(enode__in=batch).values_list("enode", flat=True)
+        )
+        addresses = {
+            enode: pubkey_to_address(enode) for enode in batch if enode not in existing
+        }
+        taken_addresses = set(
+            await Peer.filter(pubkey_address__in=list(addresses.values())).values_list(
+                "pubkey_address", flat=True
+            )
+        )
+        new_peers = []
+        for enode, address in addresses.items():
+            if address in taken_addresses:
+                logger.warning(f"import: address {address} of peer {enode} is taken")
+                address = None
+            else:
+                taken_addresses.add(address)
+            new_peers.append(
+                Peer(
+                    enode=enode, reward_interest=reward_interest, pubkey_address=address
+                )
+            )
+        if new_peers:
+            await Peer.bulk_create(new_peers)
+        created_count += len(new_peers)
+        logger.info(
+            f"import: {min(processed_count * args.batch_size, len(enodes))}"
+            f"/{len(enodes)} processed, {created_count} created"
+        )
+
+    if args.write_enodes_dir:
+        filename = os.path.join(
+            config.enodes_dir,
+            f"import-{datetime.now().strftime('%Y-%m-%d-%H.%M.%S')}.txt",
+        )
+        with open(filename, "w") as f:
+            f.writelines(enode + "\n" for enode in enodes)
+        logger.info(f"import: enodes written to {filename}")
+
+
+async def set_interest(args: argparse.Namespace) -> None:
+    filters = {}
+    if args.current is not None:
+        filters["reward_interest"] = args.current
+
+    if not args.files and not filters and not args.all:
+        logger.error("set-interest: pass --files, --current or --all")
+        sys.exit(1)
+
+    if not args.files:
+        updated_count = await Peer.filter(**filters).update(
+            reward_interest=args.interest
+        )
+        logger.info(f"set-interest: {updated_count} peers updated")
+        return
+
+    enodes = read_enodes(args.files)
+    updated_count = 0
+    for processed_count, batch in enumerate(chunks(enodes, args.batch_size), 1):
+        updated_count += await Peer.filter(enode__in=batch, **filters).update(
+            reward_interest=args.interest
+        )
+        logger.info(
+            f"set-interest: {min(processed_count * args.batch_size, len(enodes))}"
+            f"/{len(enodes)} processed, {updated_count} updated"
+        )
+
+
+async def purge_invalid(args: argparse.Namespace) -> None:
+    total_count = await Peer.all().count()
+    last_enode = ""
+    processed_count = 0
+    invalid_enodes = []
+    while True:
+        batch = (
+            await Peer.filter(enode__gt=last_enode)
+            .order_by("enode")
+            .limit(args.batch_size)
+            .values_list("enode", flat=True)
+        )
+        if not batch:
+            break
+        last_enode = batch[-1]
+        processed_count += len(batch)
+
+        batch_invalid = [enode for enode in batch if not valid_enode(enode)]
+        if batch_invalid and not args.dry_run:
+            await Healthcheck.filter(peer_id__in=batch_invalid).delete()
+            await DailyUptime.filter(peer_id__in=batch_invalid).delete()
+            await Peer.filter(enode__in=batch_invalid).delete()
+        invalid_enodes += batch_invalid
+        logger.info(
+            f"purge-invalid: {processed_count}/{total_count} processed, "
+            f"{len(invalid_enodes)} invalid"
+        )
+
+    if args.rewrite_files and not args.dry_run:
+        for filename in glob.glob(os.path.join(config.enodes_dir, "*.txt")):
+            with open(filename) as f:
+                lines = f.readlines()
+            valid_lines = [line for line in lines if valid_enode(line.strip())]
+            if len(valid_lines) != len(lines):
+                with open(filename, "w") as f:
+                    f.writelines(valid_lines)
+                logger.info(
+                    f"purge-invalid: {len(lines) - len(valid_lines)} "
+                    f"lines removed from {filename}"
+                )
+
+
+async def recompute(args: argparse.Namespace) -> None:
+    try:
+        rate = await Rate.get_rate(config.reward_currency)
+    except DoesNotExist:
+        rate = 0
+
+    total_count = await Peer.all().count()
+    output = open(args.output, "w") if args.output else sys.stdout
+    writer = csv.writer(output)
+    writer.writerow(["enode", "address", "online_percent", "expected_rewards"])
+    timestamp = timezone.now() - timedelta(days=1)
+    last_enode = ""
+    processed_count = 0
+    try:
+        while True:
+            peers = (
+                await Peer.filter(enode__gt=last_enode)
+                .order_by("enode")
+                .limit(args.batch_size)
+            )
+            if not peers:
+                break
+            last_enode = peers[-1].enode
+            processed_count += len(peers)
+
+            healthchecks = {}
+            for healthcheck in await Healthcheck.filter(
+                peer_id__in=[peer.enode for peer in peers],
+                timestamp__gte=timestamp,
+            ).order_by("timestamp"):
+                healthchecks[healthcheck.peer_id] = healthcheck
+
+            for peer in peers:
+                healthcheck = healthchecks.get(peer.enode)
+                online_percent = (
+                    round(
+                        healthcheck.online_counter * 100 / healthcheck.total_counter,
+                        2,
+                    )
+                    if healthcheck and healthcheck.total_counter
+                    else 0.0
+                )
+                expected_rewards = 0
+                if online_percent >= config.reward_min_percent:
+                    expected_rewards = int(
+                        online_percent * float(peer.reward_interest) * rate
+                    )
+                writer.writerow(
+                    [
+                        peer.enode,
+                        peer.pubkey_address,
+                        online_percent,
+                        expected_rewards,
+                    ]
+                )
+            logger.info(f"recompute: {processed_count}/{total_count} processed")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    await update_network_stats()
+    logger.info("recompute: network stats updated")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="bulk fleet operations")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="import enodes from files")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--interest", type=Decimal)
+    import_parser.add_argument(
+        "--write-enodes-dir",
+        action="store_true",
+        help="also write imported enodes to enodes_dir so they are pinged",
+    )
+    import_parser.set_defaults(handler=import_enodes)
+
+    interest_parser = subparsers.add_parser(
+        "set-interest", help="set reward interest of peers"
+    )
+    interest_parser.add_argument("interest", type=Decimal)
+    interest_parser.add_argument(
+        "--files", nargs="+", help="only peers with enodes from files"
+    )
+    interest_parser.add_argument(
+        "--current", type=Decimal, help="only peers with this reward interest"
+    )
+    interest_parser.add_argument(
+        "--all", action="store_true", help="update every peer when no filter is set"
+    )
+    interest_parser.set_defaults(handler=set_interest)
+
+    purge_parser = subparsers.add_parser(
+        "purge-invalid", help="delete peers with invalid enodes"
+    )
+    purge_parser.add_argument("--dry-run", action="store_true")
+    purge_parser.add_argument(
+        "--rewrite-files",
+        action="store_true",
+        help="also remove invalid enodes from enodes_dir files",
+    )
+    purge_parser.set_defaults(handler=purge_invalid)
+
+    recompute_parser = subparsers.add_parser(
+        "recompute", help="recompute expected rewards of peers and network stats"
+    )
+    recompute_parser.add_argument("--output", help="output csv, stdout by default")
+    recompute_parser.set_defaults(handler=recompute)
+
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(init_db())
+        loop.run_until_complete(args.handler(args))
+    finally:
+        loop.run_until_complete(Tortoise.close_connections())
@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import os
+import sys
+from datetime import date
+
+from tortoise import Tortoise
+
+sys.path.append(os.path.abspath(os.path.join(__file__, *[os.pardir] * 4)))
+
+from src.consts import LEDGER_EXPORT_BATCH_SIZE
+from src.core.db import init_db
+from src.rewards.export import LEDGER_FORMATS
+from src.rewards.models import AirdropStatus
+
+
+async def export_ledger(args: argparse.Namespace) -> None:
+    iter_rows, _ = LEDGER_FORMATS[args.format]
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        async for chunk in iter_rows(
+            date_from=args.date_from,
+            date_to=args.date_to,
+            statuses=args.status,
+            include_undated=not args.exclude_undated,
+            batch_size=args.batch_size,
+        ):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="export rewards ledger")
+    parser.add_argument("--format", choices=LEDGER_FORMATS, default="csv")
+    parser.add_argument("--output", help="output file, stdout by default")
+    parser.add_argument("--date-from", type=date.fromisoformat)
+    parser.add_argument("--date-to", type=date.fromisoformat)
+    parser.add_argument(
+        "--status",
+        type=AirdropStatus,
+        action="append",
+        choices=list(AirdropStatus),
+        help="airdrop status, can be repeated",
+    )
+    parser.add_argument(
+        "--exclude-undated",
+        action="store_true",
+        help="drop airdrops created before dates were recorded "
+        "when filtering by date",
+    )
+    parser.add_argument("--batch-size", type=int, default=LEDGER_EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(init_db())
+        loop.run_until_complete(export_ledger(args))
+    finally:
+        loop.run_until_complete(Tortoise.close_connections())
@@ -1,12 +1,32 @@
 # flake8: noqa
 import redis
+import redis.asyncio
+
+REDIS_CONNECTION_KWARGS = {
+    "host": "redis",
+    "port": 6379,
+    "db": 0,
+    "decode_responses": True,
+}
+
+EXPIRE_IF_EQUAL_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("expire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+DELETE_IF_EQUAL_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
 
 
 class RedisClient:
     def __init__(self) -> None:
-        self.pool = redis.ConnectionPool(
-            host="redis", port=6379, db=0, decode_responses=True
-        )
+        self.pool = redis.ConnectionPool(**REDIS_CONNECTION_KWARGS)
 
     def set_connection(self) -> None:
         self._conn = redis.Redis(connection_pool=self.pool)
@@ -42,6 +62,40 @@ class RedisClient:
         connection = cls().connection
         connection.delete(key)
 
+    @classmethod
+    def set_if_not_exists(cls, key: str, value: any, expire: int = None) -> bool:
+        connection = cls().connection
+        return bool(connection.set(key, value, ex=expire, nx=True))
+
+    @classmethod
+    def expire_if_equal(cls, key: str, value: any, expire: int) -> bool:
+        connection = cls().connection
+        return bool(connection.eval(EXPIRE_IF_EQUAL_SCRIPT, 1, key, value, expire))
+
+    @classmethod
+    def delete_if_equal(cls, key: str, value: any) -> bool:
+        connection = cls().connection
+        return bool(connection.eval(DELETE_IF_EQUAL_SCRIPT, 1, key, value))
+
+    @classmethod
+    def hgetall(cls, key: str) -> dict:
+        connection = cls().connection
+        return connection.hgetall(key)
+
+    @classmethod
+    def hset(cls, key: str, mapping: dict) -> None:
+        connection = cls().connection
+        connection.hset(key, mapping=mapping)
+
+    @classmethod
+    def publish(cls, channel: str, message: str) -> int:
+        connection = cls().connection
+        return connection.publish(channel, message)
+
+    @classmethod
+    def async_connection(cls) -> "redis.asyncio.Redis":
+        return redis.asyncio.Redis(**REDIS_CONNECTION_KWARGS)
+
     @classmethod
     def get_and_del(cls, key: str) -> None:
         connection = cls().connection
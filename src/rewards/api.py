@@ -1,10 +1,26 @@
+import asyncio
+import json
+import secrets
+from datetime import date
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
 from eth_keys import keys
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from web3 import Web3
 
-from src.rewards.models import Peer
-from src.rewards.schemas import PeerStatus
+from src.consts import (
+    NETWORK_STATS_CACHE_MAX_AGE_SECS,
+    NETWORK_STATS_KEY,
+    PEER_STATUS_STREAM_KEEPALIVE_SECS,
+)
+from src.redis_utils import RedisClient
+from src.rewards.export import LEDGER_FORMATS
+from src.rewards.models import AirdropStatus, Peer
+from src.rewards.schemas import NetworkStats, PeerStatus, PeerUptimeHistory
+from src.rewards.stream import broadcaster
+from src.settings import config
+from src.utils import OnlinePeersUnavailableError
 
 router = APIRouter(prefix="/api/v1")
 
@@ -14,26 +30,36 @@ invalid_input_response = JSONResponse(
 )
 
 
-@router.post(
-    "/status/{pubkey_or_address}",
-    response_model=PeerStatus,
-    description="get status of machine by public key or address",
-)
-async def get_enode_status(address_or_pubkey: str) -> JSONResponse:
+def parse_address_or_pubkey(address_or_pubkey: str) -> Optional[Tuple[str, str]]:
+    """
+    Detect whether value is a public key or an address
+    :param address_or_pubkey: public key or DUCX address
+    :return: Peer field name and normalized value or None if value is invalid
+    """
     address_or_pubkey = address_or_pubkey.lower()
     if len(address_or_pubkey) == 128:
         try:
             pubkey_bytes = Web3.toBytes(hexstr=address_or_pubkey)
             keys.PublicKey(pubkey_bytes).to_checksum_address()
-            query_arg = "enode"
-        except Exception:
-            return invalid_input_response
-    else:
-        try:
-            address_or_pubkey = Web3.toChecksumAddress(address_or_pubkey)
-            query_arg = "pubkey_address"
+            return "enode", address_or_pubkey
         except Exception:
-            return invalid_input_response
+            return None
+    try:
+        return "pubkey_address", Web3.toChecksumAddress(address_or_pubkey)
+    except Exception:
+        return None
+
+
+@router.post(
+    "/status/{pubkey_or_address}",
+    response_model=PeerStatus,
+    description="get status of machine by public key or address",
+)
+async def get_enode_status(address_or_pubkey: str) -> JSONResponse:
+    parsed = parse_address_or_pubkey(address_or_pubkey)
+    if not parsed:
+        return invalid_input_response
+    query_arg, address_or_pubkey = parsed
 
     peer = await Peer.get_or_none(**{query_arg: address_or_pubkey})
     if not peer:
@@ -42,5 +68,128 @@ async def get_enode_status(address_or_pubkey: str) -> JSONResponse:
             content={"error": "This public key is not recognized by the backend"},
         )
 
-    result = await peer.get_status()
+    try:
+        result = await peer.get_status()
+    except OnlinePeersUnavailableError:
+        return JSONResponse(
+            status_code=503, content={"error": "Online peers are not available yet"}
+        )
+    return JSONResponse(status_code=200, content=result)
+
+
+@router.get(
+    "/history/{pubkey_or_address}",
+    response_model=PeerUptimeHistory,
+    description="get daily online percent and received rewards of machine "
+    "by public key or address, paginated by next_cursor",
+)
+async def get_enode_history(
+    pubkey_or_address: str,
+    date_from: date,
+    date_to: date,
+    cursor: Optional[date] = None,
+    limit: int = Query(30, ge=1, le=366),
+) -> JSONResponse:
+    parsed = parse_address_or_pubkey(pubkey_or_address)
+    if not parsed:
+        return invalid_input_response
+    query_arg, pubkey_or_address = parsed
+
+    peer = await Peer.get_or_none(**{query_arg: pubkey_or_address})
+    if not peer:
+        return JSONResponse(
+            status_code=401,
+            content={"error": "This public key is not recognized by the backend"},
+        )
+
+    result = await peer.get_uptime_history(date_from, date_to, cursor, limit)
     return JSONResponse(status_code=200, content=result)
+
+
+@router.get(
+    "/stats",
+    response_model=NetworkStats,
+    description="get network-wide stats and uptime leaderboard, "
+    "recomputed once per ping cycle",
+)
+async def get_network_stats() -> Response:
+    network_stats = RedisClient.get(NETWORK_STATS_KEY)
+    if not network_stats:
+        return JSONResponse(
+            status_code=503, content={"error": "Network stats are not computed yet"}
+        )
+
+    return Response(
+        content=network_stats,
+        media_type="application/json",
+        headers={"Cache-Control": f"max-age={NETWORK_STATS_CACHE_MAX_AGE_SECS}"},
+    )
+
+
+async def _status_events(request: Request, keys: Set[str]) -> AsyncIterator[str]:
+    queue = broadcaster.subscribe(keys)
+    try:
+        while not await request.is_disconnected():
+            try:
+                changes = await asyncio.wait_for(
+                    queue.get(), PEER_STATUS_STREAM_KEEPALIVE_SECS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {json.dumps(changes)}\n\n"
+    finally:
+        broadcaster.unsubscribe(queue)
+
+
+@router.get(
+    "/stream/status",
+    description="server-sent events with online status and percent changes "
+    "of machines by public keys or addresses, sent once per ping cycle",
+)
+async def stream_enode_status(
+    request: Request, peers: List[str] = Query(...)
+) -> Response:
+    subscription = set()
+    for address_or_pubkey in peers:
+        parsed = parse_address_or_pubkey(address_or_pubkey)
+        if not parsed:
+            return invalid_input_response
+        subscription.add(parsed[1])
+
+    return StreamingResponse(
+        _status_events(request, subscription), media_type="text/event-stream"
+    )
+
+
+@router.get(
+    "/export/ledger",
+    description="stream rewards ledger as csv or ndjson, "
+    "requires X-API-Token header matching export_api_token from config. "
+    "Airdrops created before dates were recorded have empty date and are "
+    "included in date filtered ledger unless include_undated is false",
+)
+async def export_ledger(
+    export_format: str = Query("csv", alias="format", regex="^(csv|ndjson)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[List[AirdropStatus]] = Query(None),
+    include_undated: bool = True,
+    x_api_token: str = Header(""),
+) -> Response:
+    if not config.export_api_token or not secrets.compare_digest(
+        x_api_token, config.export_api_token
+    ):
+        return JSONResponse(status_code=403, content={"error": "Invalid API token"})
+
+    iter_rows, media_type = LEDGER_FORMATS[export_format]
+    return StreamingResponse(
+        iter_rows(
+            date_from=date_from,
+            date_to=date_to,
+            statuses=status,
+            include_undated=include_undated,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=ledger.{export_format}"},
+    )
@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, List, Optional
+
+from tortoise.query_utils import Q
+
+from src.consts import LEDGER_EXPORT_BATCH_SIZE
+from src.rewards.models import AirdropStatus, Reward
+
+LEDGER_FIELDS = ["airdrop_id", "address", "amount", "tx_hash", "status", "date"]
+
+
+async def iter_ledger(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    statuses: Optional[List[AirdropStatus]] = None,
+    include_undated: bool = True,
+    batch_size: int = LEDGER_EXPORT_BATCH_SIZE,
+) -> AsyncIterator[List[dict]]:
+    """
+    Iterate rewards joined with airdrops in batches ordered by id,
+    so only one batch is kept in memory.
+    Airdrops created before created_at was added have no date,
+    they are kept in date filtered ledger unless include_undated is False
+    :param date_from: first date of airdrops
+    :param date_to: last date of airdrops
+    :param statuses: airdrop statuses to include
+    :param include_undated: include airdrops without date when filtering by date
+    :param batch_size: rows per query
+    :return: batches of ledger rows
+    """
+    date_filters = {}
+    if date_from:
+        date_filters["airdrop__created_at__gte"] = datetime.combine(date_from, time.min)
+    if date_to:
+        date_filters["airdrop__created_at__lt"] = datetime.combine(
+            date_to + timedelta(days=1), time.min
+        )
+
+    q_filters = []
+    if date_filters:
+        date_q = Q(**date_filters)
+        if include_undated:
+            date_q |= Q(airdrop__created_at__isnull=True)
+        q_filters.append(date_q)
+
+    filters = {}
+    if statuses:
+        filters["airdrop__status__in"] = statuses
+
+    last_id = 0
+    while True:
+        rewards = (
+            await Reward.filter(*q_filters, id__gt=last_id, **filters)
+            .order_by("id")
+            .limit(batch_size)
+            .values(
+                "id",
+                "airdrop_id",
+                "address",
+                "amount",
+                "airdrop__tx_hash",
+                "airdrop__status",
+                "airdrop__created_at",
+            )
+        )
+        if not rewards:
+            return
+        last_id = rewards[-1]["id"]
+
+        yield [
+            {
+                "airdrop_id": reward["airdrop_id"],
+                "address": reward["address"],
+                "amount": str(reward["amount"]),
+                "tx_hash": reward["airdrop__tx_hash"],
+                "status": reward["airdrop__status"],
+                "date": reward["airdrop__created_at"].date().isoformat()
+                if reward["airdrop__created_at"]
+                else None,
+            }
+            for reward in rewards
+        ]
+
+
+async def iter_ledger_csv(**kwargs) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=LEDGER_FIELDS)
+    writer.writeheader()
+    async for rows in iter_ledger(**kwargs):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+
+async def iter_ledger_ndjson(**kwargs) -> AsyncIterator[str]:
+    async for rows in iter_ledger(**kwargs):
+        yield "".join(json.dumps(row) + "\n" for row in rows)
+
+
+LEDGER_FORMATS = {
+    "csv": (iter_ledger_csv, "text/csv"),
+    "ndjson": (iter_ledger_ndjson, "application/x-ndjson"),
+}
@@ -1,4 +1,5 @@
 import logging
+from datetime import date, datetime, time, timedelta
 from enum import Enum
 from typing import Optional
 
@@ -10,7 +11,7 @@ from web3.exceptions import TransactionNotFound
 
 from src.consts import MULTISENDER_GAS_ADDITION_PER_ADDRESS, MULTISENDER_INITIAL_GAS
 from src.settings import config
-from src.utils import get_redis_online_peers, pubkey_to_address
+from src.utils import get_redis_online_peers, pubkey_to_address, run_sync
 
 logger = logging.getLogger("src.rewards.models")
 
@@ -34,6 +35,8 @@ class Airdrop(Model):
     nonce = fields.BigIntField(null=True)
     gas_price = fields.DecimalField(max_digits=32, decimal_places=0, null=True)
     tx_hash = fields.CharField(max_length=100, default="")
+    created_at = fields.DatetimeField(auto_now_add=True, null=True)
+    block_number = fields.BigIntField(null=True, index=True)
 
     rewards = fields.ReverseRelation["Reward"]
 
@@ -48,18 +51,20 @@ class Airdrop(Model):
             )
 
         try:
-            receipt = config.w3.eth.getTransactionReceipt(self.tx_hash)
+            receipt = await run_sync(config.w3.eth.getTransactionReceipt, self.tx_hash)
         except TransactionNotFound:
             return
 
         try:
             if receipt["status"] == 1:
                 self.status = AirdropStatus.SUCCESS
+                self.block_number = receipt["blockNumber"]
                 await self.save()
             elif receipt["blockNumber"] is None:
                 return
             else:
                 self.status = AirdropStatus.REVERT
+                self.block_number = receipt["blockNumber"]
                 await self.save()
         except KeyError:
             return
@@ -91,17 +96,18 @@ class Airdrop(Model):
 
         gas_price = config.gas_price_wei
 
-        if config.w3.eth.get_balance(config.address) < total_amount + (
-            gas_limit * gas_price
-        ):
+        balance = await run_sync(config.w3.eth.get_balance, config.address)
+        if balance < total_amount + (gas_limit * gas_price):
             self.status = AirdropStatus.INSUFFICIENT_BALANCE
             await self.save()
-            logging.info(f"balance {config.w3.eth.get_balance(config.address)}")
+            logging.info(f"balance {balance}")
             logging.info(f"need to send {total_amount + (gas_limit * gas_price)}")
             logging.info("relay insuff balance")
             return
 
-        nonce = config.w3.eth.getTransactionCount(config.address, "pending")
+        nonce = await run_sync(
+            config.w3.eth.getTransactionCount, config.address, "pending"
+        )
         tx_params = {
             "nonce": nonce,
             "gasPrice": gas_price,
@@ -116,7 +122,7 @@ class Airdrop(Model):
         signed_tx = config.w3.eth.account.sign_transaction(
             initial_tx, config.private_key
         ).rawTransaction
-        tx_hash = config.w3.eth.sendRawTransaction(signed_tx).hex()
+        tx_hash = (await run_sync(config.w3.eth.sendRawTransaction, signed_tx)).hex()
 
         logging.info(f"tx hash {tx_hash}")
         self.tx_hash = tx_hash
@@ -128,7 +134,7 @@ class Airdrop(Model):
 
 class Reward(Model):
     airdrop = fields.ForeignKeyField("models.Airdrop", related_name="rewards")
-    address = fields.CharField(max_length=100)
+    address = fields.CharField(max_length=100, index=True)
     amount = fields.DecimalField(max_digits=100, decimal_places=0)
 
     def __str__(self) -> str:
@@ -138,8 +144,11 @@ class Reward(Model):
 class Peer(Model):
     enode = fields.CharField(pk=True, max_length=128)
     healthchecks = fields.ReverseRelation["Healthcheck"]
+    daily_uptimes = fields.ReverseRelation["DailyUptime"]
     reward_interest = fields.DecimalField(default=1, decimal_places=18, max_digits=255)
-    pubkey_address = fields.CharField(max_length=128, null=True, default=None)
+    pubkey_address = fields.CharField(
+        max_length=128, null=True, default=None, unique=True
+    )
 
     def __str__(self) -> str:
         return f"{self.enode} - {self.pubkey_address} - {self.reward_interest}"
@@ -199,6 +208,70 @@ class Peer(Model):
             "expected_rewards": expected_rewards,
         }
 
+    async def get_uptime_history(
+        self,
+        date_from: date,
+        date_to: date,
+        cursor: Optional[date] = None,
+        limit: int = 30,
+    ) -> dict:
+        """
+        Get daily uptime with received rewards, paginated by date
+        :param date_from: first date of range
+        :param date_to: last date of range
+        :param cursor: last date of previous page
+        :param limit: max days on page
+        :return: days and cursor of next page
+        """
+        if cursor:
+            date_from = max(date_from, cursor + timedelta(days=1))
+
+        daily_uptimes = (
+            await self.daily_uptimes.filter(date__gte=date_from, date__lte=date_to)
+            .order_by("date")
+            .limit(limit + 1)
+        )
+        next_cursor = None
+        if len(daily_uptimes) > limit:
+            daily_uptimes = daily_uptimes[:limit]
+            next_cursor = daily_uptimes[-1].date.isoformat()
+
+        rewards_by_date = {}
+        if daily_uptimes:
+            rewards = await Reward.filter(
+                address=self.peer_address,
+                airdrop__created_at__gte=datetime.combine(
+                    daily_uptimes[0].date, time.min
+                ),
+                airdrop__created_at__lt=datetime.combine(
+                    daily_uptimes[-1].date + timedelta(days=1), time.min
+                ),
+            ).values(
+                "amount", "airdrop__tx_hash", "airdrop__status", "airdrop__created_at"
+            )
+            for reward in rewards:
+                rewards_by_date.setdefault(
+                    reward["airdrop__created_at"].date(), []
+                ).append(
+                    {
+                        "amount": str(reward["amount"]),
+                        "tx_hash": reward["airdrop__tx_hash"],
+                        "status": reward["airdrop__status"],
+                    }
+                )
+
+        return {
+            "days": [
+                {
+                    "date": daily_uptime.date.isoformat(),
+                    "online_percent": daily_uptime.online_percent,
+                    "rewards": rewards_by_date.get(daily_uptime.date, []),
+                }
+                for daily_uptime in daily_uptimes
+            ],
+            "next_cursor": next_cursor,
+        }
+
 
 class Healthcheck(Model):
     peer = fields.ForeignKeyField("models.Peer", related_name="healthchecks")
@@ -212,6 +285,25 @@ class Healthcheck(Model):
         return f"{self.timestamp} - {self.online_counter} / {self.total_counter}"
 
 
+class DailyUptime(Model):
+    peer = fields.ForeignKeyField("models.Peer", related_name="daily_uptimes")
+    date = fields.DateField()
+    online_counter = fields.IntField(default=0)
+    total_counter = fields.IntField(default=0)
+
+    class Meta:
+        unique_together = (("peer", "date"),)
+
+    def __str__(self) -> str:
+        return f"{self.date} - {self.online_counter} / {self.total_counter}"
+
+    @property
+    def online_percent(self) -> float:
+        if not self.total_counter:
+            return 0.0
+        return round(self.online_counter * 100 / self.total_counter, 2)
+
+
 class Rate(Model):
     currency = fields.CharField(max_length=10)
     usd_rate = fields.DecimalField(decimal_places=8, max_digits=255, default=1)
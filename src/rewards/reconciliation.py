@@ -0,0 +1,264 @@
+import json
+import logging
+from collections import Counter
+from typing import Dict, List
+
+from web3 import Web3
+
+from src.consts import (
+    RECONCILIATION_BLOCKS_BATCH_SIZE,
+    RECONCILIATION_CONFIRMATIONS,
+    RECONCILIATION_DISCREPANCIES_KEY,
+    RECONCILIATION_LAST_BLOCK_KEY,
+    RECONCILIATION_LEFTOVERS_KEY,
+    RECONCILIATION_MAX_BLOCKS_PER_RUN,
+)
+from src.redis_utils import RedisClient
+from src.rewards.models import Airdrop, AirdropStatus, Reward
+from src.settings import config
+from src.utils import batch_rpc_request, run_sync
+
+logger = logging.getLogger("src.rewards.reconciliation")
+
+
+def fetch_multisend_txs(from_block: int, to_block: int) -> List[dict]:
+    """
+    Get multisend txs sent by backend address in block range
+    with their receipt status and decoded receivers and amounts
+    :param from_block: first block
+    :param to_block: last block
+    :return: txs, payouts are None if tx input can not be decoded
+    """
+    blocks = batch_rpc_request(
+        [
+            ("eth_getBlockByNumber", [hex(block_number), True])
+            for block_number in range(from_block, to_block + 1)
+        ]
+    )
+    multisender_address = config.multisender_contract.address.lower()
+    sender_address = config.address.lower()
+    txs = [
+        tx
+        for block in blocks
+        if block
+        for tx in block["transactions"]
+        if (tx["to"] or "").lower() == multisender_address
+        and tx["from"].lower() == sender_address
+    ]
+    if not txs:
+        return []
+
+    receipts = batch_rpc_request(
+        [("eth_getTransactionReceipt", [tx["hash"]]) for tx in txs]
+    )
+    multisend_txs = []
+    for tx, receipt in zip(txs, receipts):
+        try:
+            _, params = config.multisender_contract.decode_function_input(tx["input"])
+            payouts = Counter(
+                zip(
+                    map(Web3.toChecksumAddress, params.get("receivers", [])),
+                    params.get("amounts", []),
+                )
+            )
+        except ValueError as err:
+            logger.warning(f"Cant decode input of {tx['hash']} cause {err}")
+            payouts = None
+
+        multisend_txs.append(
+            {
+                "tx_hash": tx["hash"].lower(),
+                "block_number": int(tx["blockNumber"], 16),
+                "success": int(receipt["status"], 16) == 1,
+                "payouts": payouts,
+            }
+        )
+    return multisend_txs
+
+
+async def find_discrepancies(multisend_txs: List[dict]) -> Dict[str, dict]:
+    """
+    Compare multisend txs with airdrops and rewards in DB
+    :param multisend_txs: txs from fetch_multisend_txs
+    :return: discrepancies by tx hash
+    """
+    airdrops = {
+        airdrop.tx_hash.lower(): airdrop
+        for airdrop in await Airdrop.filter(
+            tx_hash__in=[tx["tx_hash"] for tx in multisend_txs]
+        )
+    }
+    payouts = {}
+    for reward in await Reward.filter(
+        airdrop_id__in=[airdrop.pk for airdrop in airdrops.values()]
+    ).values("airdrop_id", "address", "amount"):
+        payouts.setdefault(reward["airdrop_id"], Counter())[
+            (Web3.toChecksumAddress(reward["address"]), int(reward["amount"]))
+        ] += 1
+
+    discrepancies = {}
+    for tx in multisend_txs:
+        airdrop = airdrops.get(tx["tx_hash"])
+        problems = []
+        if tx["payouts"] is None:
+            problems.append("tx input can not be decoded")
+        if not airdrop:
+            problems.append("tx is not recorded as airdrop")
+        else:
+            expected_status = (
+                AirdropStatus.SUCCESS if tx["success"] else AirdropStatus.REVERT
+            )
+            if airdrop.status not in (expected_status, AirdropStatus.PENDING):
+                problems.append(
+                    f"airdrop {airdrop.pk} is {airdrop.status.value}, "
+                    f"tx is {expected_status.value}"
+                )
+            if tx["payouts"] is not None and tx["payouts"] != payouts.get(
+                airdrop.pk, Counter()
+            ):
+                problems.append(f"tx payouts differ from rewards of {airdrop.pk}")
+
+        if problems:
+            discrepancies[tx["tx_hash"]] = {
+                "block_number": tx["block_number"],
+                "airdrop_id": airdrop.pk if airdrop else None,
+                "problems": problems,
+            }
+    return discrepancies
+
+
+async def find_missing_txs(
+    from_block: int, to_block: int, multisend_txs: List[dict]
+) -> Dict[str, dict]:
+    """
+    Find successful airdrops mined in block range whose tx was not found there
+    :param from_block: first block
+    :param to_block: last block
+    :param multisend_txs: txs from fetch_multisend_txs for the same range
+    :return: discrepancies by tx hash
+    """
+    seen_tx_hashes = {tx["tx_hash"] for tx in multisend_txs}
+    airdrops = await Airdrop.filter(
+        status=AirdropStatus.SUCCESS,
+        block_number__gte=from_block,
+        block_number__lte=to_block,
+    )
+    return {
+        airdrop.tx_hash.lower(): {
+            "block_number": airdrop.block_number,
+            "airdrop_id": airdrop.pk,
+            "problems": ["tx of successful airdrop is not found in its block"],
+        }
+        for airdrop in airdrops
+        if airdrop.tx_hash.lower() not in seen_tx_hashes
+    }
+
+
+async def locate_successful_airdrops() -> Dict[str, dict]:
+    """
+    Set block numbers of successful airdrops relayed before they were recorded,
+    so they are checked when their blocks are scanned
+    :return: discrepancies by tx hash for airdrops without mined successful tx
+    """
+    airdrops = await Airdrop.filter(status=AirdropStatus.SUCCESS, block_number=None)
+    discrepancies = {}
+    located_airdrops = []
+    for start in range(0, len(airdrops), RECONCILIATION_BLOCKS_BATCH_SIZE):
+        end = start + RECONCILIATION_BLOCKS_BATCH_SIZE
+        batch = airdrops[start:end]
+        receipts = await run_sync(
+            batch_rpc_request,
+            [("eth_getTransactionReceipt", [airdrop.tx_hash]) for airdrop in batch],
+        )
+        for airdrop, receipt in zip(batch, receipts):
+            problem = None
+            if not receipt or receipt["blockNumber"] is None:
+                problem = "tx of successful airdrop is not found on chain"
+            elif int(receipt["status"], 16) != 1:
+                problem = "tx of successful airdrop is reverted"
+
+            if problem:
+                discrepancies[airdrop.tx_hash.lower()] = {
+                    "block_number": None,
+                    "airdrop_id": airdrop.pk,
+                    "problems": [problem],
+                }
+            else:
+                airdrop.block_number = int(receipt["blockNumber"], 16)
+                located_airdrops.append(airdrop)
+
+    if located_airdrops:
+        await Airdrop.bulk_update(located_airdrops, fields=["block_number"])
+    return discrepancies
+
+
+def report_discrepancies(discrepancies: Dict[str, dict]) -> None:
+    for tx_hash, discrepancy in discrepancies.items():
+        logger.warning(f"reconciliation: {tx_hash} {discrepancy}")
+    if discrepancies:
+        RedisClient.hset(
+            RECONCILIATION_DISCREPANCIES_KEY,
+            {
+                tx_hash: json.dumps(discrepancy)
+                for tx_hash, discrepancy in discrepancies.items()
+            },
+        )
+
+
+async def reconcile_airdrops() -> None:
+    """
+    Scan new confirmed blocks for multisend txs and report those
+    not matching airdrops and rewards, successful airdrops whose tx
+    is missing, then report unpaid airdrops
+    """
+    discrepancies = await locate_successful_airdrops()
+    report_discrepancies(discrepancies)
+    discrepancies_count = len(discrepancies)
+
+    latest_block = (
+        await run_sync(lambda: config.w3.eth.block_number)
+        - RECONCILIATION_CONFIRMATIONS
+    )
+    last_block = RedisClient.get(RECONCILIATION_LAST_BLOCK_KEY)
+    if last_block is not None:
+        last_block = int(last_block)
+    elif config.reconciliation_start_block is not None:
+        last_block = config.reconciliation_start_block - 1
+    else:
+        last_block = max(latest_block - RECONCILIATION_MAX_BLOCKS_PER_RUN, -1)
+    to_block = min(latest_block, last_block + RECONCILIATION_MAX_BLOCKS_PER_RUN)
+
+    for from_block in range(
+        last_block + 1, to_block + 1, RECONCILIATION_BLOCKS_BATCH_SIZE
+    ):
+        batch_to_block = min(
+            from_block + RECONCILIATION_BLOCKS_BATCH_SIZE - 1, to_block
+        )
+        multisend_txs = await run_sync(fetch_multisend_txs, from_block, batch_to_block)
+        discrepancies = await find_missing_txs(
+            from_block, batch_to_block, multisend_txs
+        )
+        if multisend_txs:
+            discrepancies.update(await find_discrepancies(multisend_txs))
+        report_discrepancies(discrepancies)
+        discrepancies_count += len(discrepancies)
+        RedisClient.set(RECONCILIATION_LAST_BLOCK_KEY, batch_to_block)
+
+    leftovers = await Airdrop.filter(
+        status__in=(AirdropStatus.INSUFFICIENT_BALANCE, AirdropStatus.REVERT)
+    ).values("id", "status", "tx_hash")
+    RedisClient.set(
+        RECONCILIATION_LEFTOVERS_KEY,
+        json.dumps(
+            [
+                {**leftover, "status": AirdropStatus(leftover["status"]).value}
+                for leftover in leftovers
+            ]
+        ),
+    )
+    if leftovers:
+        logger.warning(f"reconciliation: {len(leftovers)} airdrops were not paid")
+
+    logger.info(
+        f"reconciled blocks up to {to_block}, {discrepancies_count} discrepancies"
+    )
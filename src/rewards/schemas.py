@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
@@ -5,3 +7,35 @@ class PeerStatus(BaseModel):
     online_status: bool
     online_percent: float
     expected_rewards: str
+
+
+class PeerReward(BaseModel):
+    amount: str
+    tx_hash: str
+    status: str
+
+
+class PeerUptimeDay(BaseModel):
+    date: str
+    online_percent: float
+    rewards: List[PeerReward]
+
+
+class PeerUptimeHistory(BaseModel):
+    days: List[PeerUptimeDay]
+    next_cursor: Optional[str]
+
+
+class LeaderboardPeer(BaseModel):
+    enode: str
+    online_percent: float
+
+
+class NetworkStats(BaseModel):
+    total_peers: int
+    online_peers: int
+    average_online_percent: float
+    projected_payout: str
+    top_peers: List[LeaderboardPeer]
+    bottom_peers: List[LeaderboardPeer]
+    updated_at: str
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import logging
+from typing import List, Optional, Set, Tuple
+
+from src.consts import PEER_STATUS_CHANGES_CHANNEL
+from src.redis_utils import RedisClient
+
+logger = logging.getLogger("src.rewards.stream")
+
+
+class PeerStatusBroadcaster:
+    """
+    Listens to peer status changes published by ping_nodes
+    and fans them out to subscribers of this process
+    """
+
+    def __init__(self) -> None:
+        self.subscribers: List[Tuple[Set[str], asyncio.Queue]] = []
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self._listen())
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def subscribe(self, keys: Set[str]) -> asyncio.Queue:
+        """
+        Subscribe to changes of peers
+        :param keys: enodes and checksum addresses of peers
+        :return: queue receiving lists of changes
+        """
+        queue = asyncio.Queue()
+        self.subscribers.append((keys, queue))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers = [
+            (keys, subscriber_queue)
+            for keys, subscriber_queue in self.subscribers
+            if subscriber_queue is not queue
+        ]
+
+    def broadcast(self, changes: List[dict]) -> None:
+        for keys, queue in self.subscribers:
+            subscriber_changes = [
+                change
+                for change in changes
+                if change["enode"] in keys or change["pubkey_address"] in keys
+            ]
+            if subscriber_changes:
+                queue.put_nowait(subscriber_changes)
+
+    async def _listen(self) -> None:
+        while True:
+            connection = RedisClient.async_connection()
+            pubsub = connection.pubsub()
+            try:
+                await pubsub.subscribe(PEER_STATUS_CHANGES_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    self.broadcast(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                logger.warning(f"Peer status changes listener failed cause {err}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+                await connection.close()
+
+
+broadcaster = PeerStatusBroadcaster()
@@ -1,15 +1,42 @@
 import json
 import logging
-from datetime import timedelta
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Set
 
 from tortoise import timezone
+from tortoise.exceptions import DoesNotExist
 from tortoise.transactions import atomic
 
-from src.consts import DECIMALS
+from src.consts import (
+    DAILY_UPTIME_BATCH_SIZE,
+    DECIMALS,
+    NETWORK_STATS_KEY,
+    NETWORK_STATS_LEADERBOARD_SIZE,
+    PEER_ADDRESSES_BATCH_SIZE,
+    PEER_STATUS_CHANGES_CHANNEL,
+    PEER_STATUSES_KEY,
+    PING_NODES_BATCH_SIZE,
+)
 from src.redis_utils import RedisClient
-from src.rewards.models import Airdrop, AirdropStatus, Healthcheck, Peer, Rate, Reward
-from src.settings import config
-from src.utils import pubkey_to_address, request_active_enodes, valid_enode
+from src.rewards.models import (
+    Airdrop,
+    AirdropStatus,
+    DailyUptime,
+    Healthcheck,
+    Lock,
+    Peer,
+    Rate,
+    Reward,
+)
+from src.settings import SHARD_INDEX, SHARDS_COUNT, config
+from src.utils import (
+    pubkey_to_address,
+    request_active_enodes,
+    set_redis_online_peers,
+    shard_enodes,
+    valid_enode,
+)
 
 logger = logging.getLogger("src.rewards.tasks")
 
@@ -18,23 +45,71 @@ class AirdropError(Exception):
     pass
 
 
+async def get_or_create_peer(enode: str) -> Peer:
+    """
+    Get peer or create it with address, leaving address unset
+    if it is already taken by another peer
+    :param enode: valid enode
+    :return: peer
+    """
+    peer = await Peer.get_or_none(enode=enode)
+    if peer:
+        return peer
+
+    address = pubkey_to_address(enode)
+    if await Peer.filter(pubkey_address=address).exists():
+        logger.warning(f"Address {address} of peer {enode} is taken")
+        address = None
+
+    peer, _ = await Peer.get_or_create(
+        enode=enode,
+        defaults={
+            "reward_interest": round(config.default_usd_reward_amount / 100, 18),
+            "pubkey_address": address,
+        },
+    )
+    return peer
+
+
 async def ping_nodes() -> None:
+    """
+    Count current ping in healthchecks of peers of this shard. Statuses are
+    published and daily uptime recorded per batch, so a run cancelled
+    at its deadline keeps the work done for finished batches
+    :return: None
+    """
     logger.info("try ping nodes")
     active_enodes = await request_active_enodes()
-    RedisClient().set("online_peers", json.dumps(list(active_enodes)), 5 * 60)
+    set_redis_online_peers(active_enodes)
 
     logger.debug("active nodes: \n{}".format("\n".join(active_enodes)))
 
-    for enode in config.enodes:
-        if not valid_enode(enode):
-            continue
-
-        peer, _ = await Peer.get_or_create(
-            enode=enode,
-            defaults={
-                "reward_interest": round(config.default_usd_reward_amount / 100, 18)
-            },
-        )
+    enodes = [
+        enode
+        for enode in shard_enodes(config.enodes, SHARD_INDEX, SHARDS_COUNT)
+        if valid_enode(enode)
+    ]
+    # shuffled so a cancelled run does not skip the same peers every cycle
+    random.shuffle(enodes)
+    for start in range(0, len(enodes), PING_NODES_BATCH_SIZE):
+        end = start + PING_NODES_BATCH_SIZE
+        statuses = await ping_nodes_batch(enodes[start:end], active_enodes)
+        publish_status_changes(statuses)
+        await record_daily_uptime(statuses)
+
+
+async def ping_nodes_batch(
+    enodes: List[str], active_enodes: Set[str]
+) -> Dict[str, dict]:
+    """
+    Count current ping in last day healthcheck of peers
+    :param enodes: valid enodes
+    :param active_enodes: online enodes
+    :return: current online status and percent by enode
+    """
+    statuses = {}
+    for enode in enodes:
+        peer = await get_or_create_peer(enode)
 
         is_online = enode in active_enodes
         timestamp = timezone.now() - timedelta(days=1)
@@ -53,6 +128,119 @@ async def ping_nodes() -> None:
         healthcheck.total_counter += 1
         await healthcheck.save()
 
+        statuses[enode] = {
+            "online_status": is_online,
+            "online_percent": round(
+                healthcheck.online_counter * 100 / healthcheck.total_counter, 2
+            ),
+        }
+    return statuses
+
+
+async def record_daily_uptime(statuses: Dict[str, dict]) -> None:
+    """
+    Count current ping in calendar day uptime of peers
+    :param statuses: current online status and percent by enode
+    :return: None
+    """
+    today = timezone.now().date()
+    enodes = list(statuses)
+    for start in range(0, len(enodes), DAILY_UPTIME_BATCH_SIZE):
+        end = start + DAILY_UPTIME_BATCH_SIZE
+        batch = enodes[start:end]
+        daily_uptimes = {
+            daily_uptime.peer_id: daily_uptime
+            for daily_uptime in await DailyUptime.filter(peer_id__in=batch, date=today)
+        }
+        to_create = []
+        for enode in batch:
+            daily_uptime = daily_uptimes.get(enode)
+            if not daily_uptime:
+                daily_uptime = DailyUptime(peer_id=enode, date=today)
+                to_create.append(daily_uptime)
+            daily_uptime.online_counter += int(statuses[enode]["online_status"])
+            daily_uptime.total_counter += 1
+
+        if to_create:
+            await DailyUptime.bulk_create(to_create)
+        if daily_uptimes:
+            await DailyUptime.bulk_update(
+                list(daily_uptimes.values()),
+                fields=["online_counter", "total_counter"],
+            )
+
+
+def publish_status_changes(statuses: Dict[str, dict]) -> None:
+    """
+    Diff peer statuses with previous cycle and publish changed ones
+    :param statuses: current online status and percent by enode
+    :return: None
+    """
+    previous_statuses = RedisClient.hgetall(PEER_STATUSES_KEY)
+    changes = []
+    for enode, status in statuses.items():
+        previous_status = previous_statuses.get(enode)
+        if previous_status and json.loads(previous_status) == status:
+            continue
+        changes.append(
+            {"enode": enode, "pubkey_address": pubkey_to_address(enode), **status}
+        )
+
+    if statuses:
+        RedisClient.hset(
+            PEER_STATUSES_KEY,
+            {enode: json.dumps(status) for enode, status in statuses.items()},
+        )
+    if changes:
+        RedisClient.publish(PEER_STATUS_CHANGES_CHANNEL, json.dumps(changes))
+        logger.info(f"published {len(changes)} peer status changes")
+
+
+async def update_network_stats() -> None:
+    """
+    Aggregate latest statuses of all shards into network stats document,
+    run once per ping cycle by the leader
+    """
+    statuses = {
+        enode: json.loads(status)
+        for enode, status in RedisClient.hgetall(PEER_STATUSES_KEY).items()
+        if enode in config.enodes
+    }
+    reward_interests = dict(await Peer.all().values_list("enode", "reward_interest"))
+    try:
+        rate = await Rate.get_rate(config.reward_currency)
+    except DoesNotExist:
+        rate = 0
+
+    projected_payout = 0
+    for enode, status in statuses.items():
+        if status["online_percent"] >= config.reward_min_percent:
+            projected_payout += int(
+                status["online_percent"] * float(reward_interests.get(enode, 0)) * rate
+            )
+
+    leaderboard = sorted(
+        (
+            {"enode": enode, "online_percent": status["online_percent"]}
+            for enode, status in statuses.items()
+        ),
+        key=lambda peer: peer["online_percent"],
+        reverse=True,
+    )
+    online_percents = [status["online_percent"] for status in statuses.values()]
+    network_stats = {
+        "total_peers": len(statuses),
+        "online_peers": sum(status["online_status"] for status in statuses.values()),
+        "average_online_percent": round(sum(online_percents) / len(online_percents), 2)
+        if online_percents
+        else 0.0,
+        "projected_payout": str(projected_payout),
+        "top_peers": leaderboard[:NETWORK_STATS_LEADERBOARD_SIZE],
+        "bottom_peers": leaderboard[::-1][:NETWORK_STATS_LEADERBOARD_SIZE],
+        "updated_at": timezone.now().isoformat(),
+    }
+    RedisClient.set(NETWORK_STATS_KEY, json.dumps(network_stats))
+
 
 async def send_rewards() -> None:
     try:
@@ -66,18 +254,18 @@ async def send_rewards() -> None:
 
 @atomic()
 async def create_airdrop() -> Airdrop:
+    await Lock.filter(pk=1).only("id").select_for_update()
+    today = datetime.combine(timezone.now().date(), datetime.min.time())
+    if await Airdrop.filter(created_at__gte=today).exists():
+        raise AirdropError("Airdrop for today is already created")
+
     airdrop = await Airdrop.create()
     reward_count = 0
     for enode in config.enodes:
         if not valid_enode(enode):
             continue
 
-        peer, _ = await Peer.get_or_create(
-            enode=enode,
-            defaults={
-                "reward_interest": round(config.default_usd_reward_amount / 100, 18)
-            },
-        )
+        peer = await get_or_create_peer(enode)
 
         healthcheck = (
             await peer.healthchecks.filter(total_counter__gte=10)
@@ -145,11 +333,45 @@ async def update_rates() -> None:
 
 
 async def update_peer_addresses() -> None:
-    unset_peers = await Peer.filter(pubkey_address=None).all()
-    for peer in unset_peers:
-        if not valid_enode(peer.enode):
-            continue
-
-        peer.pubkey_address = pubkey_to_address(peer.enode)
-        await peer.save(update_fields=("pubkey_address",))
-        logging.info(f"Set address {peer.pubkey_address} for peer {peer.enode}")
+    """
+    Backfill addresses of peers created before addresses were set on creation
+    """
+    last_enode = ""
+    updated_count = 0
+    while True:
+        unset_peers = (
+            await Peer.filter(pubkey_address=None, enode__gt=last_enode)
+            .order_by("enode")
+            .limit(PEER_ADDRESSES_BATCH_SIZE)
+        )
+        if not unset_peers:
+            break
+        last_enode = unset_peers[-1].enode
+
+        addresses = {
+            peer.enode: pubkey_to_address(peer.enode)
+            for peer in unset_peers
+            if valid_enode(peer.enode)
+        }
+        taken_addresses = set(
+            await Peer.filter(pubkey_address__in=list(addresses.values())).values_list(
+                "pubkey_address", flat=True
+            )
+        )
+        peers_to_update = []
+        for peer in unset_peers:
+            address = addresses.get(peer.enode)
+            if not address:
+                continue
+            if address in taken_addresses:
+                logger.warning(f"Address {address} of peer {peer.enode} is taken")
+                continue
+            taken_addresses.add(address)
+            peer.pubkey_address = address
+            peers_to_update.append(peer)
+
+        if peers_to_update:
+            await Peer.bulk_update(peers_to_update, fields=["pubkey_address"])
+        updated_count += len(peers_to_update)
+
+    logger.info(f"Set addresses for {updated_count} peers")
@@ -3,7 +3,7 @@ import glob
 import logging.config
 import os
 from dataclasses import dataclass, field
-from typing import List, Set
+from typing import List, Optional, Set
 
 import yaml
 from eth_account import Account
@@ -26,6 +26,41 @@ POSTGRES_URL = "postgres://{user}:{password}@{hostname}:{port}/{db}".format(
     port=os.getenv("POSTGRES_PORT", 5432),
 )
 
+POSTGRES_READ_URL = (
+    "postgres://{user}:{password}@{hostname}:{port}/{db}".format(
+        user=os.getenv("POSTGRES_USER", "rewards"),
+        password=os.getenv("POSTGRES_PASSWORD", "rewards"),
+        hostname=os.getenv("POSTGRES_READ_HOST"),
+        db=os.getenv("POSTGRES_DB", "rewards"),
+        port=os.getenv("POSTGRES_READ_PORT", os.getenv("POSTGRES_PORT", 5432)),
+    )
+    if os.getenv("POSTGRES_READ_HOST")
+    else None
+)
+
+DB_POOL_SIZES = {
+    "api": (
+        int(os.getenv("API_DB_POOL_MIN_SIZE", 1)),
+        int(os.getenv("API_DB_POOL_MAX_SIZE", 20)),
+    ),
+    # API writes nothing, its primary pool is only used when reads go to replica
+    "api_write": (
+        int(os.getenv("API_WRITE_DB_POOL_MIN_SIZE", 1)),
+        int(os.getenv("API_WRITE_DB_POOL_MAX_SIZE", 2)),
+    ),
+    "scheduler": (
+        int(os.getenv("SCHEDULER_DB_POOL_MIN_SIZE", 1)),
+        int(os.getenv("SCHEDULER_DB_POOL_MAX_SIZE", 5)),
+    ),
+}
+
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))
+SHARDS_COUNT = int(os.getenv("SHARDS_COUNT", 1))
+if not 0 <= SHARD_INDEX < SHARDS_COUNT:
+    raise ValueError(
+        f"SHARD_INDEX={SHARD_INDEX} must be in range 0..{SHARDS_COUNT - 1}"
+    )
+
 MODELS_MODULE = ["src.rewards.models", "aerich.models"]
 
 TORTOISE_ORM = {
@@ -38,6 +73,34 @@ TORTOISE_ORM = {
 }
 
 
+def get_tortoise_config(role: str) -> dict:
+    """
+    Build ORM config with pool sizes of process role,
+    API process reads from replica connection if POSTGRES_READ_HOST is set
+    :param role: "api" or "scheduler"
+    :return: Tortoise config
+    """
+    pool_params = "?minsize={}&maxsize={}"
+    connections = {"default": POSTGRES_URL + pool_params.format(*DB_POOL_SIZES[role])}
+    routers = []
+    if role == "api" and POSTGRES_READ_URL:
+        connections["default"] = POSTGRES_URL + pool_params.format(
+            *DB_POOL_SIZES["api_write"]
+        )
+        connections["read"] = POSTGRES_READ_URL + pool_params.format(
+            *DB_POOL_SIZES["api"]
+        )
+        routers = ["src.core.db.ReadReplicaRouter"]
+
+    return {
+        "connections": connections,
+        "apps": {
+            "models": {"models": MODELS_MODULE, "default_connection": "default"},
+        },
+        "routers": routers,
+    }
+
+
 @dataclass
 class Config:
     json_rpc_urls: List[str]
@@ -60,13 +123,16 @@ class Config:
     rates_url: str
     default_usd_reward_amount: float
     api: RatesAPI = field(init=False)
+    leader_lease_ttl_secs: int = 30
+    export_api_token: Optional[str] = None
+    reconciliation_start_block: Optional[int] = None
 
     def __post_init__(self) -> None:
         enodes_tmp = []
         with contextlib.ExitStack() as stack:
             for filename in glob.glob(os.path.join(self.enodes_dir, "*.txt")):
                 enodes_tmp += [
-                    line.strip() for line in stack.enter_context(open(filename))
+                    line.strip().lower() for line in stack.enter_context(open(filename))
                 ]
 
         self.enodes = set(enodes_tmp)
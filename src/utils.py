@@ -1,6 +1,11 @@
+import asyncio
+import bisect
+import functools
+import hashlib
 import json
 import logging
-from typing import Set
+import uuid
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple
 
 import requests
 from eth_keys import keys
@@ -8,13 +13,44 @@ from eth_utils.exceptions import ValidationError as EthUtilsValidationError
 from requests.adapters import HTTPAdapter
 from web3 import Web3
 
+from src.consts import (
+    ONLINE_PEERS_EXPIRE_SECS,
+    ONLINE_PEERS_KEY,
+    ONLINE_PEERS_LOCK_EXPIRE_SECS,
+    ONLINE_PEERS_LOCK_KEY,
+    ONLINE_PEERS_STALE_EXPIRE_SECS,
+    ONLINE_PEERS_STALE_KEY,
+    ONLINE_PEERS_WAIT_INTERVAL_SECS,
+)
 from src.redis_utils import RedisClient
 from src.settings import config
 
 logger = logging.getLogger("src.utils")
 
+_online_peers_refresh: Optional[asyncio.Task] = None
+
+
+class OnlinePeersUnavailableError(Exception):
+    pass
+
+
+async def run_sync(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking call (RPC, HTTP) in thread pool so event loop stays responsive
+    and awaiting job can be cancelled at deadline. The call itself is not
+    interrupted on cancel, it finishes in background thread
+    :param func: blocking function
+    :return: function result
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
 
 async def request_active_enodes() -> Set[str]:
+    return await run_sync(_request_active_enodes)
+
+
+def _request_active_enodes() -> Set[str]:
     payload = {
         "method": "parity_netPeers",
         "params": [],
@@ -44,6 +80,36 @@ async def request_active_enodes() -> Set[str]:
     return active_enodes
 
 
+def batch_rpc_request(calls: List[Tuple[str, list]]) -> List[Any]:
+    """
+    Send several JSON-RPC calls in one HTTP request
+    :param calls: method names with params
+    :return: results in order of calls
+    """
+    payload = [
+        {"method": method, "params": params, "id": call_id, "jsonrpc": "2.0"}
+        for call_id, (method, params) in enumerate(calls)
+    ]
+    headers = {"Content-Type": "application/json"}
+    adapter = HTTPAdapter(max_retries=config.ping_nodes_max_retries)
+    with requests.Session() as session:
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        res = session.post(
+            config.json_rpc_urls[0],
+            json=payload,
+            headers=headers,
+            timeout=config.ping_nodes_retries_timeout_secs,
+        )
+
+    results = {}
+    for response in res.json():
+        if "error" in response:
+            raise ValueError(f"JSON-RPC error {response['error']}")
+        results[response["id"]] = response["result"]
+    return [results[call_id] for call_id in range(len(calls))]
+
+
 def pubkey_to_address(pubkey: str) -> str:
     pub_key_bytes = Web3.toBytes(hexstr=pubkey)
     pub_key = keys.PublicKey(pub_key_bytes)
@@ -56,17 +122,122 @@ def valid_enode(enode: str) -> bool:
     try:
         _ = pubkey_to_address(enode)
         return True
-    except EthUtilsValidationError:
+    except (EthUtilsValidationError, ValueError):
+        # ValueError covers binascii.Error of non-hex lines like enode:// urls
         logging.warning(f"enode {enode} not valid, remove it from files and DB")
         return False
 
 
+def _ring_hash(key: str) -> int:
+    return int(hashlib.md5(key.encode()).hexdigest(), 16)
+
+
+def shard_enodes(
+    enodes: Iterable[str], shard_index: int, shards_count: int, replicas: int = 100
+) -> Set[str]:
+    """
+    Pick enodes owned by shard using consistent hashing ring,
+    so changing shards count moves only a small part of enodes between shards
+    :param enodes: all enodes
+    :param shard_index: index of current shard
+    :param shards_count: total number of shards
+    :param replicas: number of virtual nodes per shard on the ring
+    :return: enodes owned by shard
+    """
+    if shards_count <= 1:
+        return set(enodes)
+
+    ring = sorted(
+        (_ring_hash(f"{shard}:{replica}"), shard)
+        for shard in range(shards_count)
+        for replica in range(replicas)
+    )
+    ring_hashes = [ring_hash for ring_hash, _ in ring]
+
+    owned_enodes = set()
+    for enode in enodes:
+        position = bisect.bisect(ring_hashes, _ring_hash(enode)) % len(ring)
+        if ring[position][1] == shard_index:
+            owned_enodes.add(enode)
+    return owned_enodes
+
+
+def set_redis_online_peers(active_enodes: Iterable[str]) -> str:
+    """
+    Save online peers to Redis together with long-living stale copy
+    :param active_enodes: currently online enodes
+    :return: serialized online peers
+    """
+    value = json.dumps(list(active_enodes))
+    RedisClient.set(ONLINE_PEERS_KEY, value, ONLINE_PEERS_EXPIRE_SECS)
+    RedisClient.set(ONLINE_PEERS_STALE_KEY, value, ONLINE_PEERS_STALE_EXPIRE_SECS)
+    return value
+
+
+async def _refresh_redis_online_peers() -> Optional[str]:
+    """
+    Request online peers from RPC nodes unless another process is already doing it
+    :return: serialized online peers or None if refresh is held by another process
+    """
+    token = uuid.uuid4().hex
+    if not RedisClient.set_if_not_exists(
+        ONLINE_PEERS_LOCK_KEY, token, ONLINE_PEERS_LOCK_EXPIRE_SECS
+    ):
+        return None
+
+    try:
+        active_enodes = await request_active_enodes()
+        return set_redis_online_peers(active_enodes)
+    finally:
+        RedisClient.delete_if_equal(ONLINE_PEERS_LOCK_KEY, token)
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception():
+        logger.warning(f"Cant refresh online peers cause {task.exception()}")
+
+
+def _start_online_peers_refresh() -> asyncio.Task:
+    global _online_peers_refresh
+    if _online_peers_refresh is None or _online_peers_refresh.done():
+        _online_peers_refresh = asyncio.ensure_future(_refresh_redis_online_peers())
+        _online_peers_refresh.add_done_callback(_log_refresh_error)
+    return _online_peers_refresh
+
+
+async def _wait_redis_online_peers() -> Optional[str]:
+    waited = 0.0
+    while RedisClient.get(ONLINE_PEERS_LOCK_KEY):
+        if waited >= ONLINE_PEERS_LOCK_EXPIRE_SECS:
+            break
+        await asyncio.sleep(ONLINE_PEERS_WAIT_INTERVAL_SECS)
+        waited += ONLINE_PEERS_WAIT_INTERVAL_SECS
+    return RedisClient.get(ONLINE_PEERS_KEY) or RedisClient.get(ONLINE_PEERS_STALE_KEY)
+
+
 async def get_redis_online_peers() -> list:
-    active_enodes = RedisClient().get("online_peers")
+    """
+    Get online peers from Redis. On expiry only one refresh per process
+    and one across processes is started, other callers get stale value
+    or wait for the refresh result
+    :raise OnlinePeersUnavailableError: refresh failed and there is no stale value
+    :return: online enodes
+    """
+    active_enodes = RedisClient.get(ONLINE_PEERS_KEY)
+    if active_enodes:
+        return json.loads(active_enodes)
+
+    refresh = _start_online_peers_refresh()
+    active_enodes = RedisClient.get(ONLINE_PEERS_STALE_KEY)
     if not active_enodes:
-        active_enodes = await request_active_enodes()
-        active_enodes = json.dumps(list(active_enodes))
-        RedisClient().set("online_peers", active_enodes, 5 * 60)
+        try:
+            active_enodes = await asyncio.shield(refresh)
+        except Exception:
+            # already logged by _log_refresh_error
+            active_enodes = None
+    if not active_enodes:
+        active_enodes = await _wait_redis_online_peers()
+    if not active_enodes:
+        raise OnlinePeersUnavailableError("Online peers refresh failed")
 
-    active_enodes = json.loads(active_enodes)
-    return active_enodes
+    return json.loads(active_enodes)
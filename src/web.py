@@ -2,6 +2,7 @@ from fastapi import FastAPI
 
 from src.core.db import init_db
 from src.rewards.api import router
+from src.rewards.stream import broadcaster
 
 
 def get_application() -> FastAPI:
@@ -22,8 +23,9 @@ web.include_router(router)
 @web.on_event("startup")
 async def startup_event():
     await init_db(web)
+    broadcaster.start()
 
 
 @web.on_event("shutdown")
 async def shutdown_event():
-    pass
+    await broadcaster.stop()